@@ -1,6 +1,28 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import OperationalError, connections, transaction
+from django.utils.functional import cached_property
 # <HINT> Import any new Models here
-from .models import Course, Lesson, Instructor, Learner, Question, Choice
+from .models import Course, Lesson, Instructor, Learner, Question, Choice, Submission, refresh_correct_choice_ids
+
+
+class FastAdminPaginator(Paginator):
+    """
+    Paginator that caps the time spent on counting the change list rows
+    on PostgreSQL, a huge count is returned if the COUNT query times out
+    """
+
+    @cached_property
+    def count(self):
+        connection = connections[self.object_list.db]
+        if connection.vendor != 'postgresql':
+            return super().count
+        try:
+            with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+                cursor.execute('SET LOCAL statement_timeout TO 200;')
+                return super().count
+        except OperationalError:
+            return 9999999999
 
 
 # <HINT> Register QuestionInline and ChoiceInline classes here
@@ -23,20 +45,29 @@ class LessonInline(admin.StackedInline):
 class CourseAdmin(admin.ModelAdmin):
     inlines = [LessonInline]
     list_display = ('name', 'pub_date')
-    list_filter = ['pub_date']
+    date_hierarchy = 'pub_date'
     search_fields = ['name', 'description']
 
 
 class LessonAdmin(admin.ModelAdmin):
     list_display = ['title', 'course']
+    search_fields = ['title']
+    autocomplete_fields = ['course']
+    list_select_related = ('course',)
+    list_per_page = 50
+    paginator = FastAdminPaginator
     inlines = [QuestionInline]
 
 
 @admin.register(Question)
 class QuestionAdmin(admin.ModelAdmin):
     list_display = ('question_text', 'lesson_title', 'grade')
-    list_filter = ('lesson', 'grade')
-    search_fields = ('question_text', 'lesson')
+    list_filter = ('grade', ('lesson', admin.RelatedOnlyFieldListFilter))
+    list_select_related = ('lesson',)
+    list_per_page = 50
+    paginator = FastAdminPaginator
+    search_fields = ('question_text', 'lesson__title')
+    autocomplete_fields = ['lesson']
     inlines = [ChoiceInline]
 
     def lesson_title(self, obj):
@@ -49,11 +80,35 @@ class QuestionAdmin(admin.ModelAdmin):
 class ChoiceAdmin(admin.ModelAdmin):
     list_display = ('question', 'text')
     list_filter = ('is_correct',)
+    list_select_related = ('question',)
+    list_per_page = 50
+    paginator = FastAdminPaginator
     search_fields = ('choice_text',)
+    autocomplete_fields = ['question']
 
     def text(self, obj):
         return obj.choice_text[:50]
 
+    def delete_queryset(self, request, queryset):
+        # the bulk delete action doesn't call Choice.delete(), refresh the questions here
+        question_ids = set(queryset.values_list('question_id', flat=True))
+        super().delete_queryset(request, queryset)
+        for question_id in question_ids:
+            refresh_correct_choice_ids(question_id)
+
+
+@admin.register(Submission)
+class SubmissionAdmin(admin.ModelAdmin):
+    list_display = ('id', 'username', 'course_name')
+    list_select_related = ('enrollment__user', 'enrollment__course')
+    raw_id_fields = ('enrollment', 'choices')
+
+    def username(self, obj):
+        return obj.enrollment.user.username
+
+    def course_name(self, obj):
+        return obj.enrollment.course.name
+
 
 admin.site.register(Course, CourseAdmin)
 admin.site.register(Lesson, LessonAdmin)
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class OnlinecourseConfig(AppConfig):
     name = 'onlinecourse'
+
+    def ready(self):
+        from . import signals  # noqa: F401
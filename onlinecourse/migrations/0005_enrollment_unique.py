@@ -0,0 +1,43 @@
+# Generated by Django 3.1.3 on 2026-10-15 00:34
+
+from django.db import migrations, models
+from django.db.models import Count, F, Min
+
+
+def remove_duplicate_enrollments(apps, schema_editor):
+    Course = apps.get_model('onlinecourse', 'Course')
+    Enrollment = apps.get_model('onlinecourse', 'Enrollment')
+    Submission = apps.get_model('onlinecourse', 'Submission')
+    duplicates = (
+        Enrollment.objects.values('user_id', 'course_id')
+        .annotate(kept_id=Min('id'), total=Count('id'))
+        .filter(total__gt=1)
+    )
+    for duplicate in duplicates:
+        extra = Enrollment.objects.filter(
+            user_id=duplicate['user_id'], course_id=duplicate['course_id']
+        ).exclude(pk=duplicate['kept_id'])
+        # keep the submissions of the removed enrollments on the kept one
+        Submission.objects.filter(enrollment__in=extra).update(enrollment_id=duplicate['kept_id'])
+        extra.delete()
+        Course.objects.filter(pk=duplicate['course_id']).update(
+            total_enrollment=F('total_enrollment') - (duplicate['total'] - 1)
+        )
+    if schema_editor.connection.vendor == 'postgresql':
+        # fire the deferred FK checks now, ALTER TABLE fails with pending trigger events
+        schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('onlinecourse', '0004_submission'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_enrollments, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='enrollment',
+            constraint=models.UniqueConstraint(fields=('user', 'course'), name='uniq_enrollment'),
+        ),
+    ]
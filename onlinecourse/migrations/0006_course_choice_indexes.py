@@ -0,0 +1,21 @@
+# Generated by Django 3.1.3 on 2026-10-15 00:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('onlinecourse', '0005_enrollment_unique'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='choice',
+            index=models.Index(fields=['question', 'is_correct'], name='onlinecours_questio_6b5ec1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['-total_enrollment'], name='onlinecours_total_e_4db1c9_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 3.1.3 on 2026-10-15 00:37
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def populate_correct_choice_ids(apps, schema_editor):
+    Question = apps.get_model('onlinecourse', 'Question')
+    Choice = apps.get_model('onlinecourse', 'Choice')
+    correct_by_q = defaultdict(list)
+    for choice_id, question_id in Choice.objects.filter(is_correct=True).order_by('id').values_list('id', 'question_id'):
+        correct_by_q[question_id].append(choice_id)
+    for question_id, correct_ids in correct_by_q.items():
+        Question.objects.filter(pk=question_id).update(correct_choice_ids=correct_ids)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('onlinecourse', '0006_course_choice_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='correct_choice_ids',
+            field=models.JSONField(default=list, editable=False),
+        ),
+        migrations.RunPython(populate_correct_choice_ids, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.1.3 on 2026-10-15 00:45
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('onlinecourse', '0007_question_correct_choice_ids'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='choice',
+            name='onlinecours_questio_6b5ec1_idx',
+        ),
+    ]
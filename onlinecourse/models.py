@@ -64,8 +64,13 @@ class Course(models.Model):
     total_enrollment = models.IntegerField(default=0)
     is_enrolled = False
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-total_enrollment']),
+        ]
+
     def get_all_questions(self):
-        return Question.objects.filter(lesson__course=self)
+        return Question.objects.filter(lesson__course=self).prefetch_related('choices')
 
     def __str__(self):
         return "Name: " + self.name + "," + \
@@ -101,23 +106,42 @@ class Enrollment(models.Model):
     mode = models.CharField(max_length=5, choices=COURSE_MODES, default=AUDIT)
     rating = models.FloatField(default=5.0)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'course'], name='uniq_enrollment'),
+        ]
+
 
 class Question(models.Model):
     lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='questions')
     question_text = models.CharField(max_length=250)
     grade = models.PositiveIntegerField()
+    # ids of the correct choices, kept in sync by Choice.save() and Choice.delete(),
+    # queryset updates and deletes of choices must call refresh_correct_choice_ids()
+    correct_choice_ids = models.JSONField(default=list, editable=False)
+
+    def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
+        if not self._state.adding and not force_insert:
+            # only refresh_correct_choice_ids() writes the ids, a loaded copy may be stale
+            if update_fields is None:
+                update_fields = [f.name for f in self._meta.concrete_fields if not f.primary_key]
+            update_fields = [name for name in update_fields if name != 'correct_choice_ids']
+        super().save(force_insert, force_update, using, update_fields)
 
     def is_multi_choice(self):
-        return self.choices.filter(is_correct=True).count() > 1
-
-    def is_get_score(self, selected_ids):
-
-        all_answers = self.choices.filter(is_correct=True).count()
-        selected_correct = self.choices.filter(is_correct=True, id__in=selected_ids).count()
-        if all_answers == selected_correct:
-            return True
-        else:
-            return False
+        return len(self.correct_choice_ids) > 1
+
+    def is_get_score(self, selected_ids, correct_ids=None):
+        """
+        checks whether all the correct choices of the question are selected
+        :param selected_ids: a set of selected choices ids
+        :param correct_ids: an optional precomputed set of correct choices ids,
+            defaults to the stored correct_choice_ids
+        :return: True if the question gets its score
+        """
+        if correct_ids is None:
+            correct_ids = set(self.correct_choice_ids)
+        return bool(correct_ids) and correct_ids.issubset(selected_ids)
 
     def __str__(self):
         return f"{self.id} - {self.question_text[:25]}"
@@ -128,6 +152,46 @@ class Choice(models.Model):
     is_correct = models.BooleanField()
     choice_text = models.CharField(max_length=250)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember the stored question, it has to be refreshed too if the choice is moved
+        instance._loaded_question_id = instance.__dict__.get('question_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        loaded_question_id = getattr(self, '_loaded_question_id', None)
+        if loaded_question_id is not None and loaded_question_id != self.question_id:
+            refresh_correct_choice_ids(loaded_question_id)
+        self._loaded_question_id = self.question_id
+        self._refresh_question()
+
+    def delete(self, *args, **kwargs):
+        # cascades from Question, Lesson and Course don't call this, so they skip the refresh
+        result = super().delete(*args, **kwargs)
+        self._refresh_question()
+        return result
+
+    def _refresh_question(self):
+        correct_ids = refresh_correct_choice_ids(self.question_id)
+        if Choice.question.is_cached(self):
+            # keep the loaded question in sync with the stored ids
+            self.question.correct_choice_ids = correct_ids
+
+
+def refresh_correct_choice_ids(question_id) -> list:
+    """
+    stores the ids of the correct choices of a question on the question row
+    :param question_id: id of the question to refresh
+    :return: the stored list of correct choices ids
+    """
+    correct_ids = list(
+        Choice.objects.filter(question_id=question_id, is_correct=True).order_by('id').values_list('id', flat=True)
+    )
+    Question.objects.filter(pk=question_id).update(correct_choice_ids=correct_ids)
+    return correct_ids
+
 
 class Submission(models.Model):
     enrollment = models.ForeignKey(Enrollment, on_delete=models.CASCADE)
@@ -0,0 +1,13 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Course
+from .views import TOP_COURSES_CACHE_KEY
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def course_changed(sender, instance, **kwargs):
+    # the course list caches the most enrolled courses, drop it so the change shows up
+    cache.delete(TOP_COURSES_CACHE_KEY)
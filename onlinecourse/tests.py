@@ -1,3 +1,298 @@
-from django.test import TestCase
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import IntegrityError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.urls import reverse
 
-# Create your tests here.
+from .models import Course, Lesson, Enrollment, Question, Choice, Submission
+from .views import MAX_CHOICE_ID, extract_answers
+
+
+def create_question(lesson, grade, correct=1, wrong=1):
+    question = Question.objects.create(lesson=lesson, question_text='question', grade=grade)
+    correct_choices = [
+        Choice.objects.create(question=question, is_correct=True, choice_text='correct') for _ in range(correct)
+    ]
+    wrong_choices = [
+        Choice.objects.create(question=question, is_correct=False, choice_text='wrong') for _ in range(wrong)
+    ]
+    return question, correct_choices, wrong_choices
+
+
+def stored_ids(question):
+    return Question.objects.get(pk=question.pk).correct_choice_ids
+
+
+class ExtractAnswersTests(TestCase):
+
+    def extract(self, data):
+        return extract_answers(RequestFactory().post('/', data))
+
+    def test_collects_all_choice_values(self):
+        self.assertEqual(self.extract({'choice_1': '1', 'choice_2': ['2', '3'], 'other': '4'}), [1, 2, 3])
+
+    def test_skips_values_int_rejects(self):
+        self.assertEqual(self.extract({'choice_1': ['x', '²', '-1', '1.0', '']}), [])
+
+    def test_skips_values_out_of_integer_range(self):
+        data = {'choice_1': str(MAX_CHOICE_ID), 'choice_2': str(MAX_CHOICE_ID + 1), 'choice_3': '9' * 5000}
+        self.assertEqual(self.extract(data), [MAX_CHOICE_ID])
+
+
+class EnrollTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('learner', password='psw')
+        self.course = Course.objects.create(name='course', description='description')
+        self.url = reverse('onlinecourse:enroll', args=(self.course.id,))
+
+    def test_enrolling_twice_creates_one_enrollment(self):
+        self.client.login(username='learner', password='psw')
+        self.client.post(self.url)
+        self.client.post(self.url)
+        self.assertEqual(Enrollment.objects.filter(user=self.user, course=self.course).count(), 1)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.total_enrollment, 1)
+
+    def test_anonymous_user_is_not_enrolled(self):
+        self.client.post(self.url)
+        self.assertFalse(Enrollment.objects.exists())
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.total_enrollment, 0)
+
+    def test_duplicate_enrollment_is_rejected(self):
+        Enrollment.objects.create(user=self.user, course=self.course)
+        with self.assertRaises(IntegrityError):
+            Enrollment.objects.create(user=self.user, course=self.course)
+
+
+class CourseListTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('learner', password='psw')
+        self.courses = [
+            Course.objects.create(name=f'course {i}', description='description', total_enrollment=i)
+            for i in range(12)
+        ]
+
+    def get_course_list(self):
+        return self.client.get(reverse('onlinecourse:index')).context['course_list']
+
+    def test_lists_most_enrolled_courses_with_enrollment_flags(self):
+        Enrollment.objects.create(user=self.user, course=self.courses[10])
+        self.client.login(username='learner', password='psw')
+        course_list = self.get_course_list()
+        self.assertEqual([c.id for c in course_list], [c.id for c in reversed(self.courses[2:])])
+        self.assertEqual([c.id for c in course_list if c.is_enrolled], [self.courses[10].id])
+
+    def test_list_is_cached(self):
+        self.get_course_list()
+        # a queryset update sends no signals, so the cached list is served
+        Course.objects.filter(pk=self.courses[11].pk).update(name='renamed')
+        with self.assertNumQueries(0):
+            course_list = self.get_course_list()
+        self.assertEqual(course_list[0].name, 'course 11')
+
+    def test_enroll_clears_cache(self):
+        self.get_course_list()
+        self.client.login(username='learner', password='psw')
+        self.client.post(reverse('onlinecourse:enroll', args=(self.courses[11].id,)))
+        self.assertEqual(self.get_course_list()[0].total_enrollment, 12)
+
+    def test_saving_course_clears_cache(self):
+        self.get_course_list()
+        course = Course.objects.create(name='popular', description='description', total_enrollment=100)
+        self.assertEqual(self.get_course_list()[0].id, course.id)
+
+    def test_deleting_course_clears_cache(self):
+        self.get_course_list()
+        course_id = self.courses[11].id
+        self.courses[11].delete()
+        self.assertNotIn(course_id, [c.id for c in self.get_course_list()])
+
+
+class SubmitTests(TestCase):
+
+    def setUp(self):
+        user = User.objects.create_user('learner', password='psw')
+        self.course = Course.objects.create(name='course', description='description')
+        lesson = Lesson.objects.create(course=self.course, content='content')
+        self.enrollment = Enrollment.objects.create(user=user, course=self.course)
+        _, self.correct, self.wrong = create_question(lesson, grade=1)
+        self.client.login(username='learner', password='psw')
+
+    def test_stores_selected_choices(self):
+        choices = self.correct + self.wrong
+        response = self.client.post(
+            reverse('onlinecourse:submit', args=(self.course.id,)),
+            {f'choice_{c.id}': c.id for c in choices},
+        )
+        submission = Submission.objects.get()
+        self.assertRedirects(response, reverse('onlinecourse:exam_result', args=(self.course.id, submission.id)))
+        self.assertEqual(set(submission.choices.values_list('id', flat=True)), {c.id for c in choices})
+
+    def test_skips_unknown_choices_and_choices_of_other_courses(self):
+        other_lesson = Lesson.objects.create(course=Course.objects.create(), content='content')
+        _, other_correct, _ = create_question(other_lesson, grade=1)
+        data = {'choice_1': self.correct[0].id, 'choice_2': 999999, 'choice_3': other_correct[0].id}
+        response = self.client.post(reverse('onlinecourse:submit', args=(self.course.id,)), data)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(list(Submission.objects.get().choices.values_list('id', flat=True)), [self.correct[0].id])
+
+
+class CorrectChoiceIdsTests(TestCase):
+
+    def setUp(self):
+        course = Course.objects.create(name='course', description='description')
+        self.lesson = Lesson.objects.create(course=course, content='content')
+
+    def test_saving_choices_stores_correct_ids(self):
+        question, correct, wrong = create_question(self.lesson, grade=1, correct=2, wrong=1)
+        self.assertEqual(stored_ids(question), [c.id for c in correct])
+
+        wrong[0].is_correct = True
+        wrong[0].save()
+        self.assertEqual(stored_ids(question), [c.id for c in correct + wrong])
+
+        correct[0].is_correct = False
+        correct[0].save()
+        self.assertEqual(stored_ids(question), [correct[1].id, wrong[0].id])
+
+    def test_deleting_choice_removes_its_id(self):
+        question, correct, _ = create_question(self.lesson, grade=1, correct=2)
+        Choice.objects.get(pk=correct[0].pk).delete()
+        self.assertEqual(stored_ids(question), [correct[1].id])
+
+    def test_moving_choice_refreshes_both_questions(self):
+        first, first_correct, _ = create_question(self.lesson, grade=1, correct=2)
+        second, second_correct, _ = create_question(self.lesson, grade=1)
+        choice = Choice.objects.get(pk=first_correct[0].pk)
+        choice.question = second
+        choice.save()
+        self.assertEqual(stored_ids(first), [first_correct[1].id])
+        self.assertEqual(stored_ids(second), sorted([second_correct[0].id, choice.id]))
+
+    def test_saving_loaded_question_keeps_new_ids(self):
+        question = Question.objects.create(lesson=self.lesson, question_text='question', grade=1)
+        choice = Choice.objects.create(question=question, is_correct=True, choice_text='correct')
+        question.grade = 2
+        question.save()
+        self.assertEqual(stored_ids(question), [choice.id])
+
+    def test_saving_question_loaded_before_choice_change_keeps_new_ids(self):
+        question, correct, _ = create_question(self.lesson, grade=1)
+        loaded = Question.objects.get(pk=question.pk)
+        choice = Choice.objects.create(question_id=question.pk, is_correct=True, choice_text='correct')
+        loaded.grade = 5
+        loaded.save()
+        saved = Question.objects.get(pk=question.pk)
+        self.assertEqual(saved.grade, 5)
+        self.assertEqual(saved.correct_choice_ids, [correct[0].id, choice.id])
+
+    def test_admin_bulk_delete_refreshes_questions(self):
+        question, correct, wrong = create_question(self.lesson, grade=1, correct=2, wrong=1)
+        choice_admin = admin.site._registry[Choice]
+        choice_admin.delete_queryset(None, Choice.objects.filter(pk__in=[correct[0].pk, wrong[0].pk]))
+        self.assertEqual(stored_ids(question), [correct[1].id])
+
+    def test_deleting_question_deletes_its_choices(self):
+        question, _, _ = create_question(self.lesson, grade=1, correct=2, wrong=2)
+        question.delete()
+        self.assertFalse(Choice.objects.exists())
+
+    def test_admin_adds_question_without_choices(self):
+        User.objects.create_superuser('admin', 'admin@example.com', 'psw')
+        self.client.login(username='admin', password='psw')
+        response = self.client.post(reverse('admin:onlinecourse_question_add'), {
+            'lesson': self.lesson.id,
+            'question_text': 'question',
+            'grade': 1,
+            'choices-TOTAL_FORMS': 0,
+            'choices-INITIAL_FORMS': 0,
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Question.objects.get().correct_choice_ids, [])
+
+
+class ShowExamResultTests(TestCase):
+
+    def setUp(self):
+        user = User.objects.create_user('learner', password='psw')
+        self.course = Course.objects.create(name='course', description='description')
+        self.lesson = Lesson.objects.create(course=self.course, content='content')
+        self.enrollment = Enrollment.objects.create(user=user, course=self.course)
+        self.first, self.first_correct, self.first_wrong = create_question(self.lesson, grade=2, correct=2)
+        self.second, self.second_correct, _ = create_question(self.lesson, grade=3)
+
+    def get_grade(self, choices):
+        submission = Submission.objects.create(enrollment=self.enrollment)
+        submission.choices.set(choices)
+        response = self.client.get(reverse('onlinecourse:exam_result', args=(self.course.id, submission.id)))
+        self.assertEqual(response.status_code, 200)
+        return response.context['grade']
+
+    def test_all_correct(self):
+        self.assertEqual(self.get_grade(self.first_correct + self.second_correct), 100)
+
+    def test_partially_correct_question_gets_no_score(self):
+        self.assertEqual(self.get_grade(self.first_correct[:1] + self.second_correct), 60)
+
+    def test_extra_wrong_picks_keep_the_score(self):
+        self.assertEqual(self.get_grade(self.first_correct + self.first_wrong + self.second_correct), 100)
+
+    def test_question_without_correct_choices_gets_no_score(self):
+        _, _, wrong = create_question(self.lesson, grade=5, correct=0, wrong=2)
+        self.assertEqual(self.get_grade(self.first_correct + self.second_correct + wrong), 50)
+
+    def test_result_page_loads_questions_and_choices_once(self):
+        submission = Submission.objects.create(enrollment=self.enrollment)
+        submission.choices.set(self.first_correct)
+        url = reverse('onlinecourse:exam_result', args=(self.course.id, submission.id))
+        # course, submission, selected choices, questions and their choices
+        with self.assertNumQueries(5):
+            response = self.client.get(url)
+        self.assertEqual(response.context['questions'], [self.first, self.second])
+        self.assertContains(response, 'Correct Answer: correct', count=3)
+
+    def test_course_without_questions(self):
+        self.lesson.delete()
+        self.assertEqual(self.get_grade([]), 0)
+
+
+class CorrectChoiceIdsMigrationTests(TransactionTestCase):
+    migrate_from = [('onlinecourse', '0006_course_choice_indexes')]
+    migrate_to = [('onlinecourse', '0007_question_correct_choice_ids')]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        apps = executor.loader.project_state(self.migrate_from).apps
+        Course = apps.get_model('onlinecourse', 'Course')
+        Lesson = apps.get_model('onlinecourse', 'Lesson')
+        Question = apps.get_model('onlinecourse', 'Question')
+        Choice = apps.get_model('onlinecourse', 'Choice')
+
+        lesson = Lesson.objects.create(course=Course.objects.create(), content='content')
+        self.question = Question.objects.create(lesson=lesson, question_text='question', grade=1)
+        self.empty_question = Question.objects.create(lesson=lesson, question_text='question', grade=1)
+        self.correct_ids = [
+            Choice.objects.create(question=self.question, is_correct=True, choice_text='correct').id
+            for _ in range(2)
+        ]
+        Choice.objects.create(question=self.question, is_correct=False, choice_text='wrong')
+        Choice.objects.create(question=self.empty_question, is_correct=False, choice_text='wrong')
+
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(self.migrate_to)
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_backfills_correct_choice_ids(self):
+        self.assertEqual(stored_ids(self.question), self.correct_ids)
+        self.assertEqual(stored_ids(self.empty_question), [])
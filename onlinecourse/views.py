@@ -1,16 +1,26 @@
-from django.db.models import Sum
+from django.db import transaction
+from django.db.models import F
 from django.http import HttpResponseRedirect
-from .models import Course, Enrollment, Submission
+from .models import Course, Enrollment, Submission, Question, Choice
 from django.contrib.auth.models import User
 from django.shortcuts import get_object_or_404, render, redirect
 from django.urls import reverse
 from django.views import generic
 from django.contrib.auth import login, logout, authenticate
+from django.core.cache import cache
 import logging
+from collections import defaultdict
 
 # Get an instance of a logger
 logger = logging.getLogger(__name__)
 
+# Cache key and timeout (in seconds) of the most enrolled courses shown in the course list
+TOP_COURSES_CACHE_KEY = 'top10_courses'
+TOP_COURSES_CACHE_TIMEOUT = 60
+
+# Largest value the integer primary key of Choice can hold
+MAX_CHOICE_ID = 2147483647
+
 
 # Create your views here.
 
@@ -25,12 +35,7 @@ def registration_request(request):
         password = request.POST['psw']
         first_name = request.POST['firstname']
         last_name = request.POST['lastname']
-        user_exist = False
-        try:
-            User.objects.get(username=username)
-            user_exist = True
-        except:
-            logger.error("New user")
+        user_exist = User.objects.filter(username=username).exists()
         if not user_exist:
             user = User.objects.create_user(username=username, first_name=first_name, last_name=last_name,
                                             password=password)
@@ -62,16 +67,6 @@ def logout_request(request):
     return redirect('onlinecourse:index')
 
 
-def check_if_enrolled(user, course):
-    is_enrolled = False
-    if user.id is not None:
-        # Check if user enrolled
-        num_results = Enrollment.objects.filter(user=user, course=course).count()
-        if num_results > 0:
-            is_enrolled = True
-    return is_enrolled
-
-
 # CourseListView
 class CourseListView(generic.ListView):
     template_name = 'onlinecourse/course_list_bootstrap.html'
@@ -79,10 +74,20 @@ class CourseListView(generic.ListView):
 
     def get_queryset(self):
         user = self.request.user
-        courses = Course.objects.order_by('-total_enrollment')[:10]
-        for course in courses:
-            if user.is_authenticated:
-                course.is_enrolled = check_if_enrolled(user, course)
+        courses = cache.get_or_set(
+            TOP_COURSES_CACHE_KEY,
+            lambda: list(
+                Course.objects.only('id', 'name', 'image', 'description', 'total_enrollment')
+                .order_by('-total_enrollment')[:10]
+            ),
+            TOP_COURSES_CACHE_TIMEOUT,
+        )
+        if user.is_authenticated:
+            enrolled_ids = set(
+                Enrollment.objects.filter(user=user, course__in=courses).values_list('course_id', flat=True)
+            )
+            for course in courses:
+                course.is_enrolled = course.id in enrolled_ids
         return courses
 
 
@@ -95,12 +100,12 @@ def enroll(request, course_id):
     course = get_object_or_404(Course, pk=course_id)
     user = request.user
 
-    is_enrolled = check_if_enrolled(user, course)
-    if not is_enrolled and user.is_authenticated:
+    if user.is_authenticated:
         # Create an enrollment
-        Enrollment.objects.create(user=user, course=course, mode='honor')
-        course.total_enrollment += 1
-        course.save()
+        _, created = Enrollment.objects.get_or_create(user=user, course=course, defaults={'mode': 'honor'})
+        if created:
+            Course.objects.filter(pk=course.pk).update(total_enrollment=F('total_enrollment') + 1)
+            cache.delete(TOP_COURSES_CACHE_KEY)
 
     return HttpResponseRedirect(reverse(viewname='onlinecourse:course_details', args=(course.id,)))
 
@@ -109,11 +114,20 @@ def submit(request, course_id):
     course = get_object_or_404(Course, pk=course_id)
     user = request.user
     enrollment = Enrollment.objects.get(user=user, course=course)
-    submission = Submission.objects.create(enrollment=enrollment)
-
-    answers = extract_answers(request)
-    submission.choices.add(*answers)
-    submission.save()
+    # keep only existing choices of this course, unknown ids would fail the insert
+    answers = Choice.objects.filter(
+        id__in=extract_answers(request), question__lesson__course=course
+    ).values_list('id', flat=True)
+
+    # a failed insert of the choices must not leave an empty submission behind
+    with transaction.atomic():
+        submission = Submission.objects.create(enrollment=enrollment)
+        through = Submission.choices.through
+        through.objects.bulk_create(
+            [through(submission_id=submission.id, choice_id=choice_id) for choice_id in answers],
+            ignore_conflicts=True,
+            batch_size=500,
+        )
 
     return redirect(reverse(viewname='onlinecourse:exam_result', args=(course.id, submission.id)))
 
@@ -122,34 +136,43 @@ def extract_answers(request) -> list:
     """
     collects the selected choices from the exam form from the request object
     :param request: request object
-    :return: a list contains choices ids
+    :return: a list contains choices ids, non-numeric and out of range values are skipped
     """
-    submitted_answers = []
-    for key in request.POST:
-        if key.startswith('choice'):
-            value = request.POST[key]
-            choice_id = int(value)
-            submitted_answers.append(choice_id)
-    return submitted_answers
+    return [
+        int(value)
+        for key, values in request.POST.lists() if key.startswith('choice')
+        for value in values if is_valid_choice_id(value)
+    ]
+
+
+def is_valid_choice_id(value) -> bool:
+    # check the length first, int() refuses very long digit strings
+    return value.isdecimal() and len(value) <= len(str(MAX_CHOICE_ID)) and int(value) <= MAX_CHOICE_ID
 
 
 def show_exam_result(request, course_id, submission_id):
     course = get_object_or_404(Course, pk=course_id)
     submission = get_object_or_404(Submission, pk=submission_id)
-    selected_choices = submission.choices.all()
-    selected_ids = selected_choices.values_list('id', flat=True)
-    all_questions = course.get_all_questions()
+    selected_ids = set()
+    selected_by_q = defaultdict(set)
+    for choice_id, question_id in submission.choices.values_list('id', 'question_id'):
+        selected_ids.add(choice_id)
+        selected_by_q[question_id].add(choice_id)
+    # scored from correct_choice_ids, the choices are prefetched for the template only
+    questions = list(Question.objects.filter(lesson__course=course).prefetch_related('choices'))
 
     total_score = 0
-    for q in all_questions:
-        if q.is_get_score(selected_choices.filter(question=q)):
+    total_grade = 0
+    for q in questions:
+        if q.is_get_score(selected_by_q[q.id]):
             total_score += q.grade
+        total_grade += q.grade
 
-    total_grade = all_questions.aggregate(sum_grade=Sum('grade'))
-    percent_score = total_score * 100 // total_grade['sum_grade']
+    percent_score = total_score * 100 // total_grade if total_grade else 0
 
     data = {
         'course': course,
+        'questions': questions,
         'grade': percent_score,
         'selected_ids': selected_ids,
     }